@@ -1,9 +1,15 @@
 import streamlit as st
 import pandas as pd
+import os
 import time
-from models import STTModel, Diarizer, Summarizer
-from evaluation import get_benchmark_report, calculate_wer
-from export import export_as_json, export_as_markdown, export_as_csv
+import html
+from concurrent.futures import ThreadPoolExecutor
+from models import (
+    STTModel, Diarizer, Summarizer, RemoteSTTModel, RemoteSummarizer,
+    get_audio_duration, simple_summary, transcode_to_wav
+)
+import evaluation
+import export
 
 # Page Configuration
 st.set_page_config(page_title="Varshini AI", layout="wide", page_icon="🎙️")
@@ -34,6 +40,78 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Set to e.g. http://127.0.0.1:8000 to use the models hosted by worker.py
+WORKER_URL = os.environ.get("MEETING_WORKER_URL")
+
+# Cached Model Loaders
+@st.cache_resource(show_spinner=False)
+def get_stt(model_name):
+    if WORKER_URL:
+        return RemoteSTTModel(WORKER_URL, model_name=model_name)
+    return STTModel(model_name=model_name)
+
+@st.cache_resource(show_spinner=False)
+def get_diarizer():
+    return Diarizer()
+
+@st.cache_resource(show_spinner=False)
+def get_summarizer():
+    if WORKER_URL:
+        return RemoteSummarizer(WORKER_URL)
+    return Summarizer()
+
+# Cached Derived Data
+@st.cache_data(show_spinner=False)
+def summarize_transcript(text, summarizer_id):
+    # summarizer_id keys the cache to the loaded model resource. Errors are raised
+    # rather than falling back so a transient failure is never cached
+    return get_summarizer().summarize(text, fallback=False)
+
+@st.cache_data(show_spinner=False)
+def count_words(segments):
+    return len(" ".join(seg['text'] for seg in segments).split())
+
+@st.cache_data(show_spinner=False)
+def get_benchmark_report():
+    return evaluation.get_benchmark_report()
+
+@st.cache_data(show_spinner=False)
+def calculate_wer(ref, hyp):
+    return evaluation.calculate_wer(ref, hyp)
+
+@st.cache_data(show_spinner=False)
+def export_as_json(data):
+    return export.export_as_json(data)
+
+@st.cache_data(show_spinner=False)
+def export_as_markdown(segments, summary):
+    return export.export_as_markdown(segments, summary)
+
+@st.cache_data(show_spinner=False)
+def export_as_csv(segments):
+    return export.export_as_csv(segments)
+
+def render_speaker_card(seg):
+    return f"""
+    <div class="speaker-card">
+        <b>{html.escape(str(seg['speaker']))}</b> ({seg['start']}s – {seg['end']}s)<br>
+        {html.escape(seg['text'])}
+    </div>
+    """
+
+# Changing the preview format reruns only this fragment, not the whole script
+@st.fragment
+def render_export_preview(json_data, md_data, csv_data):
+    st.subheader("Preview")
+    preview_format = st.selectbox("Select format to preview", ["JSON", "Markdown", "CSV"])
+
+    if preview_format == "JSON":
+        st.code(json_data, language="json")
+    elif preview_format == "Markdown":
+        st.markdown(md_data)
+    else:
+        st.code(csv_data, language="csv")
+
 st.title("🎙️ Varshini AI")
 st.markdown("---")
 
@@ -61,30 +139,51 @@ with tab1:
         st.audio(audio_file)
 
         if st.button("Start Processing"):
+            import shutil
             import tempfile
-            import os
 
-            # Save uploaded file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
-                tmp_file.write(audio_file.getbuffer())
+            # Stream uploaded file to disk in 1 MiB chunks instead of copying it whole
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3", buffering=1 << 20) as tmp_file:
+                audio_file.seek(0)
+                shutil.copyfileobj(audio_file, tmp_file, length=1 << 20)
                 audio_path = tmp_file.name
 
+            wav_path = None
+            # Not used as a context manager: its exit would block on in-flight model loads
+            executor = ThreadPoolExecutor(max_workers=3)
             try:
                 with st.status("Processing Audio...", expanded=True) as status:
 
-                    st.write("📌 Step 1: Initializing models...")
+                    st.write("🎧 Step 1: Converting audio to 16 kHz mono WAV...")
                     try:
-                        stt = STTModel(model_name="whisper" if "Whisper" in model_choice else "vosk")
-                        diarizer = Diarizer()
-                        summarizer = Summarizer()
+                        # Decode once to a WAV shared by every model
+                        wav_path = transcode_to_wav(audio_path)
+                        st.write("✓ Audio converted")
+                    except Exception as e:
+                        st.error(f"Audio conversion failed: {str(e)}")
+                        raise
+
+                    st.write("📌 Step 2: Initializing models...")
+                    try:
+                        # Diarizer/summarizer loads and the duration probe overlap with transcription
+                        diarizer_future = executor.submit(get_diarizer)
+                        summarizer_future = executor.submit(get_summarizer)
+                        duration_future = executor.submit(get_audio_duration, wav_path)
+                        stt = get_stt("whisper" if "Whisper" in model_choice else "vosk")
                         st.write("✓ Models initialized")
                     except Exception as e:
                         st.error(f"Failed to initialize models: {str(e)}")
                         raise
 
-                    st.write("🎙️ Step 2: Transcribing audio (1-3 minutes for longer files)...")
+                    st.write("🎙️ Step 3: Transcribing audio (1-3 minutes for longer files)...")
                     try:
-                        full_transcript = stt.transcribe(audio_path)
+                        words = None
+                        # Word timestamps cost extra decode time; only ask for them when
+                        # pyannote loaded and will actually split the transcript by speaker
+                        if use_diarization and diarizer_future.result().use_pyannote:
+                            full_transcript, words = stt.transcribe(wav_path, return_words=True)
+                        else:
+                            full_transcript = stt.transcribe(wav_path)
                         if "ERROR" in full_transcript or "failed" in full_transcript.lower():
                             st.error(f"Transcription error: {full_transcript}")
                             raise Exception(full_transcript)
@@ -93,19 +192,25 @@ with tab1:
                         st.error(f"Transcription failed: {str(e)}")
                         raise
 
-                    st.write("👥 Step 3: Extracting speaker segments...")
+                    st.write("👥 Step 4: Extracting speaker segments...")
                     try:
-                        st.session_state.segments = diarizer.get_segments(audio_path)
-                        if st.session_state.segments:
-                            st.session_state.segments[0]["text"] = full_transcript
+                        diarizer = diarizer_future.result()
+                        st.session_state.segments = diarizer.get_segments(
+                            wav_path, full_text=full_transcript, duration=duration_future.result(), words=words
+                        )
                         st.write(f"✓ Extracted {len(st.session_state.segments)} segment(s)")
                     except Exception as e:
                         st.error(f"Diarization failed: {str(e)}")
                         raise
 
-                    st.write("✨ Step 4: Generating summary...")
+                    st.write("✨ Step 5: Generating summary...")
                     try:
-                        st.session_state.summary = summarizer.summarize(full_transcript)
+                        summarizer = summarizer_future.result()
+                        try:
+                            st.session_state.summary = summarize_transcript(full_transcript, id(summarizer))
+                        except Exception as e:
+                            st.warning(f"Model summary unavailable ({str(e)}). Using key sentences instead.")
+                            st.session_state.summary = simple_summary(full_transcript)
                         st.write(f"✓ Summary generated ({len(st.session_state.summary)} characters)")
                     except Exception as e:
                         st.error(f"Summarization failed: {str(e)}")
@@ -121,8 +226,11 @@ with tab1:
                 st.write("**Traceback:**")
                 st.code(traceback.format_exc())
             finally:
-                if os.path.exists(audio_path):
-                    os.remove(audio_path)
+                # On failure, report immediately instead of waiting for background loads
+                executor.shutdown(wait=False, cancel_futures=True)
+                for path in (audio_path, wav_path):
+                    if path and os.path.exists(path):
+                        os.remove(path)
     else:
         st.info("📤 Upload an audio file (WAV, MP3, or M4A) to get started!")
 
@@ -132,20 +240,15 @@ with tab2:
 
         with col1:
             st.subheader("Transcript")
-            for seg in st.session_state.segments:
-                st.markdown(f"""
-                <div class="speaker-card">
-                    <b>{seg['speaker']}</b> ({seg['start']}s – {seg['end']}s)<br>
-                    {seg['text']}
-                </div>
-                """, unsafe_allow_html=True)
+            transcript_html = "".join(render_speaker_card(seg) for seg in st.session_state.segments)
+            st.markdown(transcript_html, unsafe_allow_html=True)
 
         with col2:
             st.subheader("AI Summary")
             st.info(st.session_state.summary)
 
             st.subheader("Metrics")
-            word_count = sum(len(seg['text'].split()) for seg in st.session_state.segments)
+            word_count = count_words(st.session_state.segments)
             st.metric("Total Words", word_count)
             st.metric("Speakers Detected", len(set(seg['speaker'] for seg in st.session_state.segments)))
     else:
@@ -163,10 +266,13 @@ with tab3:
 
     if st.session_state.processing_done:
         st.subheader("Current Session Quality")
-        reference_text = "sample reference text"
-        hypothesis_text = st.session_state.segments[0]["text"] if st.session_state.segments else ""
-        wer = calculate_wer(reference_text, hypothesis_text)
-        st.metric("Word Error Rate (WER)", f"{wer:.2%}")
+        reference_text = st.text_area("Reference transcript (paste a human transcript to compute WER)")
+        if reference_text.strip():
+            hypothesis_text = " ".join(seg["text"] for seg in st.session_state.segments)
+            wer = calculate_wer(reference_text, hypothesis_text)
+            st.metric("Word Error Rate (WER)", f"{wer:.2%}")
+        else:
+            st.info("WER needs a reference transcript of this recording.")
 
 with tab4:
     st.header("Export Meeting Data")
@@ -184,7 +290,8 @@ with tab4:
                 label="📥 Download JSON",
                 data=json_data,
                 file_name="meeting_transcript.json",
-                mime="application/json"
+                mime="application/json",
+                on_click="ignore"
             )
 
         with col2:
@@ -194,7 +301,8 @@ with tab4:
                 label="📥 Download Markdown",
                 data=md_data,
                 file_name="meeting_transcript.md",
-                mime="text/markdown"
+                mime="text/markdown",
+                on_click="ignore"
             )
 
         with col3:
@@ -204,18 +312,11 @@ with tab4:
                 label="📥 Download CSV",
                 data=csv_data,
                 file_name="meeting_transcript.csv",
-                mime="text/csv"
+                mime="text/csv",
+                on_click="ignore"
             )
 
         st.markdown("---")
-        st.subheader("Preview")
-        preview_format = st.selectbox("Select format to preview", ["JSON", "Markdown", "CSV"])
-
-        if preview_format == "JSON":
-            st.code(json_data, language="json")
-        elif preview_format == "Markdown":
-            st.markdown(md_data)
-        else:
-            st.code(csv_data, language="csv")
+        render_export_preview(json_data, md_data, csv_data)
     else:
         st.warning("⚠️ No data to export. Please process an audio file first.")
@@ -4,5 +4,26 @@ def get_benchmark_report():
         "Vosk": {"WER": 0.15}
     }
 
+def _edit_distance(ref_words, hyp_words):
+    """Word-level Levenshtein distance with a rolling two-row buffer"""
+    try:
+        from rapidfuzz.distance import Levenshtein
+        return Levenshtein.distance(ref_words, hyp_words)
+    except ImportError:
+        pass
+
+    prev = list(range(len(hyp_words) + 1))
+    for i, ref_word in enumerate(ref_words, 1):
+        curr = [i] + [0] * len(hyp_words)
+        for j, hyp_word in enumerate(hyp_words, 1):
+            cost = 0 if ref_word == hyp_word else 1
+            curr[j] = min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + cost)
+        prev = curr
+    return prev[-1]
+
 def calculate_wer(ref, hyp):
-    return 0.1
+    ref_words = ref.lower().split()
+    hyp_words = hyp.lower().split()
+    if not ref_words:
+        return 0.0 if not hyp_words else 1.0
+    return _edit_distance(ref_words, hyp_words) / len(ref_words)
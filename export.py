@@ -1,21 +1,14 @@
-import json
-import csv
-from io import StringIO
+import orjson
+import pandas as pd
 
 def export_as_json(data):
-    return json.dumps(data, indent=2)
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
 
 def export_as_markdown(segments, summary):
-    md = "# Meeting Summary\n\n"
-    md += summary + "\n\n---\n\n## Transcript\n"
-    for s in segments:
-        md += f"- **{s['speaker']}** ({s['start']}s–{s['end']}s): {s['text']}\n"
-    return md
+    header = "# Meeting Summary\n\n" + summary + "\n\n---\n\n## Transcript\n"
+    lines = "".join(f"- **{s['speaker']}** ({s['start']}s–{s['end']}s): {s['text']}\n" for s in segments)
+    return header + lines
 
 def export_as_csv(segments):
-    buf = StringIO()
-    writer = csv.DictWriter(buf, fieldnames=["speaker", "start", "end", "text"])
-    writer.writeheader()
-    for s in segments:
-        writer.writerow(s)
-    return buf.getvalue()
+    df = pd.DataFrame(segments, columns=["speaker", "start", "end", "text"])
+    return df.to_csv(index=False, lineterminator="\r\n")
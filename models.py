@@ -1,41 +1,202 @@
 import os
-from pydub import AudioSegment
+import subprocess
+import threading
+import numpy as np
+import soundfile as sf
+
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 30
+SUMMARY_WINDOW_TOKENS = 900
+SUMMARY_OVERLAP_TOKENS = 100
+WORKER_TIMEOUT_SECONDS = 600
+
+# Held by every torch.compile warmup: Dynamo is not thread-safe, and the Whisper and
+# BART models may load on different threads
+COMPILE_LOCK = threading.Lock()
+
+
+def get_audio_duration(audio_path):
+    """Return audio duration in seconds from file metadata (no full decode)"""
+    try:
+        return sf.info(audio_path).duration
+    except Exception:
+        # Formats libsndfile can't read (e.g. m4a): ask ffprobe instead
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", audio_path],
+            capture_output=True, text=True, check=True
+        )
+        return float(result.stdout.strip())
+
+
+def load_audio(audio_path):
+    """Load audio as a 16 kHz mono float32 numpy array"""
+    try:
+        audio, sr = sf.read(audio_path, dtype="float32", always_2d=False)
+        if sr == SAMPLE_RATE and audio.ndim == 1:
+            return audio
+    except Exception:
+        pass
+    # Not already 16 kHz mono (or unreadable by libsndfile): decode and resample
+    from faster_whisper import decode_audio
+    return decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+
+
+def assign_words_to_turns(turns, words):
+    """Return the index of the speaker turn each word belongs to.
+
+    turns is a list of (start, end, label) sorted by start, and words a list of
+    (start, word). A word belongs to a turn with start <= t < end. Where turns
+    overlap (crosstalk) the latest-started turn wins if it still covers the
+    word, otherwise the longest-running covering turn does. Words outside every
+    turn go to the nearest turn. Runs in O((W + T) log T) time and O(W + T) memory.
+    """
+    turn_starts = np.array([start for start, _, _ in turns], dtype=float)
+    turn_ends = np.array([end for _, end, _ in turns], dtype=float)
+    t = np.array([start for start, _ in words], dtype=float)
+    n_turns = len(turns)
+
+    # Index of the turn with the largest end among turns 0..i (ties -> later turn)
+    running_end = np.maximum.accumulate(turn_ends)
+    longest = np.maximum.accumulate(np.where(turn_ends == running_end, np.arange(n_turns), 0))
+
+    following = np.searchsorted(turn_starts, t, side="right")  # first turn starting after t
+    started = following > 0
+    latest = np.maximum(following - 1, 0)
+    longest = longest[latest]
+    following = np.minimum(following, n_turns - 1)
+
+    in_latest = started & (t < turn_ends[latest])
+    in_longest = started & (t < turn_ends[longest])
+    # In a gap: compare the distance back to the furthest-reaching earlier turn
+    # against the distance forward to the next turn
+    prefer_previous = started & (
+        (following == latest) | (t - turn_ends[longest] <= turn_starts[following] - t)
+    )
+    nearest = np.where(prefer_previous, longest, following)
+    return np.where(in_latest, latest, np.where(in_longest, longest, nearest))
+
+
+def simple_summary(text):
+    """Fallback summary: extract key sentences"""
+    sentences = text.split(". ")
+    if len(sentences) <= 2:
+        return text
+
+    # Return first 2 sentences
+    result = ". ".join(sentences[:2]) + "."
+    print(f"✓ Fallback summary: {len(result)} chars")
+    return result
+
+
+def transcode_to_wav(audio_path):
+    """Decode audio once to a 16 kHz mono WAV next to the input and return its path"""
+    wav_path = os.path.splitext(audio_path)[0] + ".wav"
+    result = subprocess.run(
+        ["ffmpeg", "-y", "-v", "error", "-i", audio_path,
+         "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "wav", wav_path],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.strip() or f'exit code {result.returncode}'}")
+    return wav_path
+
 
 class STTModel:
-    """Speech-to-Text using OpenAI Whisper"""
-    def __init__(self, model_name="whisper"):
+    """Speech-to-Text using Whisper (faster-whisper by default, openai-whisper as fallback)"""
+    def __init__(self, model_name="whisper", backend="faster"):
         self.model_name = model_name
+        self.backend = backend
         self.model = None
-        try:
-            import whisper
-            print("Loading Whisper model...")
-            self.model = whisper.load_model("base")
-            print("✓ Whisper model loaded successfully")
-        except ImportError as e:
-            print(f"ERROR: Install whisper with: pip install openai-whisper")
-            self.model = None
-
-    def transcribe(self, audio_path):
-        """Transcribe audio file to text using Whisper"""
+        self.batched_model = None
+        # openai-whisper (and its compiled encoder) must not run on several threads at once
+        self.lock = threading.Lock()
+        if self.backend == "faster":
+            try:
+                import ctranslate2
+                from faster_whisper import WhisperModel, BatchedInferencePipeline
+                print("Loading faster-whisper model...")
+                # int8_float16 needs CUDA; CTranslate2 rejects it on CPU
+                on_gpu = ctranslate2.get_cuda_device_count() > 0
+                self.model = WhisperModel(
+                    "base", device="cuda" if on_gpu else "cpu", compute_type="int8_float16" if on_gpu else "int8"
+                )
+                self.batched_model = BatchedInferencePipeline(model=self.model)
+                print("✓ faster-whisper model loaded successfully")
+            except Exception as e:
+                print(f"Note: faster-whisper not available ({e}). Falling back to openai-whisper.")
+                self.model = None
+                self.batched_model = None
+                self.backend = "openai"
+        if self.backend == "openai":
+            try:
+                import whisper
+                print("Loading Whisper model...")
+                self.model = whisper.load_model("base")
+                print("✓ Whisper model loaded successfully")
+                self._compile_encoder()
+            except ImportError as e:
+                print(f"ERROR: Install whisper with: pip install faster-whisper")
+                self.model = None
+
+    def _compile_encoder(self):
+        """torch.compile the openai-whisper encoder (fixed 30s mel input) and warm it up"""
+        eager_encoder = self.model.encoder
+        with COMPILE_LOCK:
+            try:
+                import torch
+                self.model.encoder = torch.compile(eager_encoder, mode="reduce-overhead", fullgraph=False)
+                print("Compiling Whisper encoder (one-time warmup)...")
+                self.model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+                print("✓ Whisper encoder compiled")
+            except Exception as e:
+                print(f"Note: torch.compile unavailable for Whisper ({e}). Using eager mode.")
+                self.model.encoder = eager_encoder
+
+    def transcribe(self, audio_path, return_words=False):
+        """Transcribe audio file to text using Whisper.
+
+        With return_words=True, returns (text, words) where words is a list of
+        (start_seconds, word) tuples used to align text to speaker turns.
+        """
         if self.model is None:
-            return "ERROR: Whisper model not loaded. Install: pip install openai-whisper"
+            error_msg = "ERROR: Whisper model not loaded. Install: pip install faster-whisper"
+            return (error_msg, []) if return_words else error_msg
 
         try:
             print(f"Transcribing: {audio_path}")
-            result = self.model.transcribe(audio_path)
-            text = result.get("text", "No speech detected")
+            if self.backend == "openai":
+                with self.lock:
+                    result = self.model.transcribe(audio_path, word_timestamps=return_words)
+                text = result.get("text", "No speech detected")
+                words = [(w["start"], w["word"]) for s in result.get("segments", []) for w in s.get("words", [])]
+            else:
+                audio = load_audio(audio_path)
+                if len(audio) > CHUNK_SECONDS * SAMPLE_RATE:
+                    # Long audio: VAD-split into <=30s chunks and decode them as one batch
+                    segments, _ = self.batched_model.transcribe(
+                        audio, beam_size=1, batch_size=16, word_timestamps=return_words
+                    )
+                else:
+                    segments, _ = self.model.transcribe(
+                        audio, beam_size=1, vad_filter=True, word_timestamps=return_words
+                    )
+                segments = list(segments)
+                text = " ".join(s.text.strip() for s in segments) or "No speech detected"
+                words = [(w.start, w.word) for s in segments for w in (s.words or [])]
             print(f"✓ Transcription complete. Text length: {len(text)} chars")
-            return text
+            return (text, words) if return_words else text
         except Exception as e:
             error_msg = f"Transcription failed: {str(e)}"
             print(error_msg)
-            return error_msg
+            return (error_msg, []) if return_words else error_msg
 
 
 class Diarizer:
     """Speaker Diarization - separates different speakers"""
     def __init__(self):
         self.use_pyannote = False
+        self.use_fp16 = False
         try:
             from pyannote.audio import Pipeline
             self.pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.0")
@@ -45,27 +206,87 @@ class Diarizer:
             print(f"Note: Pyannote not available. Using simple fallback.")
             self.use_pyannote = False
 
-    def get_segments(self, audio_path):
-        """Get speaker segments with timestamps and text"""
+        if self.use_pyannote:
+            try:
+                self._move_to_gpu()
+            except Exception as e:
+                print(f"Note: Pyannote GPU setup failed ({e}). Running diarization on CPU.")
+                self.use_fp16 = False
+                import torch
+                self.pipeline.to(torch.device("cpu"))
+
+    def _move_to_gpu(self):
+        """Run the pipeline on CUDA with larger segmentation/embedding batches when available"""
+        import torch
+        if not torch.cuda.is_available():
+            return
+        self.pipeline.to(torch.device("cuda"))
+        if hasattr(self.pipeline, "embedding_batch_size"):
+            self.pipeline.segmentation_batch_size = 32
+            self.pipeline.embedding_batch_size = 32
+        self.use_fp16 = True
+        print("✓ Pyannote running on GPU (PyTorch models under FP16 autocast)")
+
+    def _diarize(self, audio_path, words):
+        """Run pyannote and split the Whisper words across the detected speaker turns"""
+        import torch
+        print("Running speaker diarization...")
+        with torch.autocast("cuda", dtype=torch.float16, enabled=self.use_fp16):
+            diarization = self.pipeline(audio_path)
+
+        turns = [(turn.start, turn.end, label) for turn, _, label in diarization.itertracks(yield_label=True)]
+        if not turns:
+            return []
+
+        # Group words by turn (stable sort keeps each turn's words in spoken order)
+        word_turns = assign_words_to_turns(turns, words)
+        order = np.argsort(word_turns, kind="stable")
+        bounds = np.searchsorted(word_turns[order], np.arange(len(turns) + 1), side="left")
+
+        speaker_names = {}
+        segments = []
+        for (start, end, label), lo, hi in zip(turns, bounds[:-1], bounds[1:]):
+            text = "".join(words[i][1] for i in order[lo:hi]).strip()
+            if not text:
+                continue
+            speaker = speaker_names.setdefault(label, f"Speaker {len(speaker_names) + 1}")
+            segments.append({
+                "speaker": speaker,
+                # Plain floats: orjson rejects numpy float scalars in the JSON export
+                "start": round(float(start), 1),
+                "end": round(float(end), 1),
+                "text": text
+            })
+        return segments
+
+    def get_segments(self, audio_path, full_text=None, duration=None, words=None):
+        """Get speaker segments with timestamps, reusing an existing transcript.
+
+        When pyannote is available and word timestamps are given, the transcript
+        is split across the detected speaker turns.
+        """
         try:
-            print("Extracting audio duration...")
-            # Get audio duration
-            audio = AudioSegment.from_file(audio_path)
-            duration = len(audio) / 1000  # Convert to seconds
-            print(f"Audio duration: {duration:.2f} seconds")
+            if self.use_pyannote and words:
+                try:
+                    segments = self._diarize(audio_path, words)
+                    if segments:
+                        print(f"✓ Segments created: {len(segments)}")
+                        return segments
+                except Exception as e:
+                    print(f"Note: Pyannote diarization failed ({e}). Using simple fallback.")
 
-            # Get transcription
-            print("Starting transcription...")
-            stt = STTModel()
-            full_text = stt.transcribe(audio_path)
+            if duration is None:
+                print("Extracting audio duration...")
+                duration = get_audio_duration(audio_path)
+            print(f"Audio duration: {duration:.2f} seconds")
 
             print(f"Creating segments...")
-            # Return as single speaker for now
+            # Single speaker fallback
             segments = [{
                 "speaker": "Speaker 1",
                 "start": 0,
                 "end": int(duration),
-                "text": full_text
+                "text": full_text or ""
             }]
 
             print(f"✓ Segments created: {len(segments)}")
@@ -86,17 +307,62 @@ class Summarizer:
     """AI Summarizer using Transformers"""
     def __init__(self):
         self.summarizer = None
+        # HF pipelines (and the compiled BART forward) are not safe to call from several
+        # threads at once; Streamlit sessions and worker requests share one instance
+        self.lock = threading.Lock()
         try:
             from transformers import pipeline
             print("Loading summarizer model...")
-            self.summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+            model, tokenizer = self._load_int8_model("facebook/bart-large-cnn")
+            self.summarizer = pipeline("summarization", model=model, tokenizer=tokenizer)
             print("✓ Summarizer loaded")
         except Exception as e:
             print(f"Note: Transformers not available: {e}")
             self.summarizer = None
+        if self.summarizer:
+            self._compile_model()
 
-    def summarize(self, text):
-        """Generate summary of text"""
+    def _load_int8_model(self, model_id):
+        """Load a seq2seq model with int8 weights (bitsandbytes on GPU, dynamic quantization on CPU)"""
+        import torch
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(model_id)
+        if torch.cuda.is_available():
+            try:
+                from transformers import BitsAndBytesConfig
+                model = AutoModelForSeq2SeqLM.from_pretrained(
+                    model_id, quantization_config=BitsAndBytesConfig(load_in_8bit=True), device_map="auto"
+                )
+                return model, tokenizer
+            except Exception as e:
+                print(f"Note: 8-bit GPU loading unavailable ({e}). Using CPU int8.")
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_id)
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model, tokenizer
+
+    def _compile_model(self):
+        """torch.compile BART's forward (what generate() calls per token) and warm it up"""
+        model = self.summarizer.model
+        with COMPILE_LOCK:
+            try:
+                import torch
+                # Compiling the module wrapper is not enough: generate() is forwarded to the
+                # eager module and calls its forward directly, so compile forward itself
+                model.forward = torch.compile(model.forward, dynamic=True)
+                print("Compiling summarizer model (one-time warmup)...")
+                self.summarizer("warmup " * 60, max_length=20, min_length=5, do_sample=False)
+                print("✓ Summarizer model compiled")
+            except Exception as e:
+                # Dynamically quantized (int8) Linear layers may not compile; keep eager forward
+                print(f"Note: torch.compile unavailable for summarizer ({e}). Using eager mode.")
+                model.__dict__.pop("forward", None)
+
+    def summarize(self, text, fallback=True):
+        """Generate summary of text.
+
+        With fallback=False, model errors are raised instead of being replaced by
+        the extractive fallback, so callers can avoid caching a degraded summary.
+        """
         if not text or len(text.strip()) == 0:
             return "No text to summarize."
 
@@ -111,27 +377,88 @@ class Summarizer:
         if self.summarizer:
             try:
                 print(f"Summarizing {len(words)} words...")
-                # Limit input to 500 words
-                if len(words) > 500:
-                    text = " ".join(words[:500])
-
-                summary = self.summarizer(text, max_length=130, min_length=30, do_sample=False)
-                result = summary[0]["summary_text"]
+                with self.lock:
+                    result = self._map_reduce(text)
                 print(f"✓ Summary generated: {len(result)} chars")
                 return result
             except Exception as e:
+                if not fallback:
+                    raise
                 print(f"Summarization error: {str(e)}. Using fallback.")
-                return self._simple_summary(text)
+                return simple_summary(text)
         else:
-            return self._simple_summary(text)
+            return simple_summary(text)
 
-    def _simple_summary(self, text):
-        """Fallback: extract key sentences"""
-        sentences = text.split(". ")
-        if len(sentences) <= 2:
-            return text
+    def _map_reduce(self, text):
+        """Summarize overlapping token windows in one batch, then summarize the combined summaries"""
+        tokenizer = self.summarizer.tokenizer
+        ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+        while len(ids) > SUMMARY_WINDOW_TOKENS:
+            stride = SUMMARY_WINDOW_TOKENS - SUMMARY_OVERLAP_TOKENS
+            windows = [
+                tokenizer.decode(ids[i:i + SUMMARY_WINDOW_TOKENS])
+                for i in range(0, len(ids) - SUMMARY_OVERLAP_TOKENS, stride)
+            ]
+            print(f"Summarizing {len(windows)} chunks...")
+            summaries = self.summarizer(
+                windows, max_length=120, min_length=30, do_sample=False, batch_size=8, truncation=True
+            )
+            text = " ".join(s["summary_text"] for s in summaries)
+            ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+            # Combined chunk summaries are already short enough to return
+            if len(ids) < 512:
+                return text
+
+        summary = self.summarizer(text, max_length=130, min_length=30, do_sample=False, truncation=True)
+        return summary[0]["summary_text"]
+
+
+class RemoteSTTModel:
+    """Speech-to-Text client for the Whisper model hosted by worker.py"""
+    def __init__(self, worker_url, model_name="whisper"):
+        self.worker_url = worker_url.rstrip("/")
+        self.model_name = model_name
 
-        # Return first 2 sentences
-        result = ". ".join(sentences[:2]) + "."
-        print(f"✓ Fallback summary: {len(result)} chars")
-        return result
+    def transcribe(self, audio_path, return_words=False):
+        """Transcribe audio file via the worker (same return shape as STTModel.transcribe)"""
+        import requests
+        try:
+            print(f"Sending {audio_path} to worker for transcription...")
+            with open(audio_path, "rb") as f:
+                response = requests.post(
+                    f"{self.worker_url}/transcribe",
+                    params={"return_words": return_words},
+                    files={"audio": f},
+                    timeout=WORKER_TIMEOUT_SECONDS
+                )
+            response.raise_for_status()
+            result = response.json()
+            text = result["text"]
+            words = [tuple(w) for w in result["words"]]
+            print(f"✓ Transcription complete. Text length: {len(text)} chars")
+            return (text, words) if return_words else text
+        except Exception as e:
+            error_msg = f"Transcription failed: {str(e)}"
+            print(error_msg)
+            return (error_msg, []) if return_words else error_msg
+
+
+class RemoteSummarizer:
+    """Summarizer client for the BART model hosted by worker.py"""
+    def __init__(self, worker_url):
+        self.worker_url = worker_url.rstrip("/")
+
+    def summarize(self, text, fallback=True):
+        """Generate summary of text via the worker, falling back to key sentences on failure"""
+        import requests
+        try:
+            response = requests.post(
+                f"{self.worker_url}/summarize", json={"text": text}, timeout=WORKER_TIMEOUT_SECONDS
+            )
+            response.raise_for_status()
+            return response.json()["summary"]
+        except Exception as e:
+            if not fallback:
+                raise
+            print(f"Summarization error: {str(e)}. Using fallback.")
+            return simple_summary(text)
@@ -0,0 +1,36 @@
+import time
+
+from models import assign_words_to_turns
+
+
+def test_overlapping_turn_only_takes_words_inside_it():
+    # Speaker B interjects during A's turn; A's words after 6s stay with A
+    turns = [(0.0, 10.0, "A"), (5.0, 6.0, "B")]
+    words = [(1.0, " one"), (5.5, " two"), (7.0, " three"), (9.5, " four")]
+    assert list(assign_words_to_turns(turns, words)) == [0, 1, 0, 0]
+
+
+def test_words_in_gap_go_to_nearest_turn():
+    turns = [(0.0, 2.0, "A"), (8.0, 10.0, "B")]
+    words = [(1.0, " a"), (2.5, " late"), (7.5, " early"), (9.0, " b"), (12.0, " after")]
+    assert list(assign_words_to_turns(turns, words)) == [0, 0, 1, 1, 1]
+
+
+def test_turn_end_is_exclusive():
+    turns = [(0.0, 2.0, "A"), (2.0, 4.0, "B")]
+    words = [(1.9, " a"), (2.0, " b")]
+    assert list(assign_words_to_turns(turns, words)) == [0, 1]
+
+
+def test_long_meeting_alignment_stays_linear():
+    # ~3 hours: 3000 back-to-back turns, 27000 words
+    n_turns, words_per_turn = 3000, 9
+    turns = [(i * 3.6, (i + 1) * 3.6, f"S{i % 4}") for i in range(n_turns)]
+    words = [(i * 0.4 + 0.1, " w") for i in range(n_turns * words_per_turn)]
+
+    start = time.perf_counter()
+    word_turns = assign_words_to_turns(turns, words)
+    elapsed = time.perf_counter() - start
+
+    assert list(word_turns) == [i // words_per_turn for i in range(len(words))]
+    assert elapsed < 1.0
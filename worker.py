@@ -0,0 +1,61 @@
+"""Model worker hosting Whisper and BART outside the Streamlit process.
+
+Run with:  uvicorn worker:app --host 127.0.0.1 --port 8000
+Then start the app with MEETING_WORKER_URL=http://127.0.0.1:8000
+"""
+import os
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from fastapi import FastAPI, File, UploadFile
+from pydantic import BaseModel
+
+from models import STTModel, Summarizer
+
+@lru_cache(maxsize=None)
+def get_stt():
+    return STTModel()
+
+
+@lru_cache(maxsize=None)
+def get_summarizer():
+    return Summarizer()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Load (and compile/warm up) both models once before serving requests
+    get_stt()
+    get_summarizer()
+    yield
+
+
+app = FastAPI(title="Varshini AI Worker", lifespan=lifespan)
+
+
+class SummarizeRequest(BaseModel):
+    text: str
+
+
+@app.post("/transcribe")
+def transcribe(audio: UploadFile = File(...), return_words: bool = False):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
+        shutil.copyfileobj(audio.file, tmp_file, length=1024 * 1024)
+        audio_path = tmp_file.name
+
+    try:
+        if return_words:
+            text, words = get_stt().transcribe(audio_path, return_words=True)
+        else:
+            text, words = get_stt().transcribe(audio_path), []
+    finally:
+        os.remove(audio_path)
+    return {"text": text, "words": words}
+
+
+@app.post("/summarize")
+def summarize(request: SummarizeRequest):
+    summary = get_summarizer().summarize(request.text, fallback=False)
+    return {"summary": summary}